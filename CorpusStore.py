@@ -0,0 +1,125 @@
+# ScriptName : CorpusStore.py
+# Description : Memory maps dataset file and records byte offsets of every
+#               paragraph and of every sentence inside paragraph, so that text
+#               is sliced out of the mapping only when it is actually needed.
+#               Pages of the mapping are shared through the OS page cache
+#               between all processes serving the same dataset.
+# Arguments :
+#       Input :
+#           datasetName(str) : Path of dataset text file. Assumption is that
+#                              each paragraph is separated by new line
+#                              character
+#       Output :
+#           Instance of CorpusStore which behaves as read only list of
+#           paragraphs
+#               getSentences(function) : Take paragraph index and return list
+#                                        of sentences of that paragraph
+
+# Importing Library
+from nltk.tokenize import sent_tokenize
+from array import array
+import mmap
+
+class CorpusStore:
+    def __init__(self, datasetName):
+        self.datasetName = datasetName
+        self.paraStart = array('q')     # byte offset where paragraph starts
+        self.paraEnd = array('q')       # byte offset where paragraph ends
+        self.sentStart = array('q')     # byte offset where sentence starts
+        self.sentEnd = array('q')       # byte offset where sentence ends
+        self.paraSentence = array('q')  # index of first sentence of paragraph
+        self.data = b""
+
+        self.datasetFile = open(datasetName, "rb")
+        try:
+            self.data = mmap.mmap(self.datasetFile.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file can not be mapped
+            pass
+
+        # Initialize
+        self.computeOffsets()
+
+    # Records paragraph and sentence byte offsets of the dataset. Paragraphs
+    # are stripped lines, empty lines are skipped
+    def computeOffsets(self):
+        lineStart = 0
+        size = len(self.data)
+        while lineStart < size:
+            lineEnd = self.data.find(b"\n", lineStart)
+            if lineEnd == -1:
+                lineEnd = size
+            line = self.data[lineStart:lineEnd].decode("utf-8")
+            paragraph = line.strip()
+            if len(paragraph) > 0:
+                leading = len(line) - len(line.lstrip())
+                start = lineStart + len(line[:leading].encode("utf-8"))
+                end = start + len(paragraph.encode("utf-8"))
+                self.paraStart.append(start)
+                self.paraEnd.append(end)
+                self.paraSentence.append(len(self.sentStart))
+                self.computeSentenceOffsets(paragraph, start)
+            lineStart = lineEnd + 1
+        self.paraSentence.append(len(self.sentStart))
+
+    # Records byte offsets of sentences of single paragraph
+    # Input:
+    #       paragraph(str)  : Paragraph text
+    #       offset(int)     : Byte offset of paragraph in dataset file
+    def computeSentenceOffsets(self, paragraph, offset):
+        cursor = 0
+        for sent in sent_tokenize(paragraph):
+            index = paragraph.find(sent, cursor)
+            if index == -1:
+                # Tokenizer altered sentence, rest of paragraph is recorded as
+                # single sentence so no text is lost
+                rest = paragraph[cursor:].lstrip()
+                if len(rest) > 0:
+                    offset += len(paragraph[cursor:len(paragraph)-len(rest)].encode("utf-8"))
+                    self.sentStart.append(offset)
+                    self.sentEnd.append(offset + len(rest.encode("utf-8")))
+                break
+            offset += len(paragraph[cursor:index].encode("utf-8"))
+            length = len(sent.encode("utf-8"))
+            self.sentStart.append(offset)
+            self.sentEnd.append(offset + length)
+            offset += length
+            cursor = index + len(sent)
+
+    # Get sentences of paragraph in order of occurance
+    # Input:
+    #       index(int)      : Paragraph index
+    # Output:
+    #       sentences(list) : List of sentence string
+    def getSentences(self, index):
+        sentences = []
+        for s in range(self.paraSentence[index], self.paraSentence[index + 1]):
+            sentences.append(self.data[self.sentStart[s]:self.sentEnd[s]].decode("utf-8"))
+        return sentences
+
+    # Release mapping and underlying file
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = b""
+        self.datasetFile.close()
+
+    def __len__(self):
+        return len(self.paraStart)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if index < 0 or index >= len(self):
+            raise IndexError("paragraph index out of range")
+        return self.data[self.paraStart[index]:self.paraEnd[index]].decode("utf-8")
+
+    def __iter__(self):
+        for index in range(0, len(self)):
+            yield self[index]
+
+    def __repr__(self):
+        msg = "Dataset " + self.datasetName + "\n"
+        msg += "Total Paras " + str(len(self.paraStart)) + "\n"
+        msg += "Total Sentences " + str(len(self.sentStart)) + "\n"
+        return msg
@@ -3,36 +3,91 @@
 #               Additionally, helps in answer processing 
 # Arguments : 
 #       Input :
-#           paragraphs(list)        : List of paragraphs
+#           paragraphs(list)        : List of paragraphs or CorpusStore
 #           useStemmer(boolean)     : Indicate to use stemmer for word tokens
 #           removeStopWord(boolean) : Indicate to remove stop words from 
 #                                     paragraph in order to keep relevant words
+#           useSynonyms(boolean)    : Indicate to build synonym table for
+#                                     query expansion
+#           useEntityFilter(boolean): Indicate to record entity types present
+#                                     in every paragraph and sentence, in order
+#                                     to skip candidates unable to contain
+#                                     expected answer type
+#           dedupThreshold(float)   : Estimated Jaccard similarity above which
+#                                     near duplicate paragraphs are collapsed
+#                                     into first of them, None to keep all.
+#                                     ValueError unless in range (0, 1]
 #       Output :
 #           Instance of DocumentRetrievalModel with following structure
 #               query(function) : Take instance of processedQuestion and return
 #                                 answer based on IR and Answer Processing
-#                                 techniques
+#                                 techniques, optionally within time budget
+#               queryWithStatus(function) : Same as query, also tells whether
+#                                 answer was degraded to meet time budget
+#               synonymTable(dict) : Porter stem of word and list of synonyms
+#                                    which are present in paragraphs
+#               duplicates(dict) : Index of kept paragraph and list of indexes
+#                                  of paragraphs collapsed into it
+#           Model is not modified after construction, so query and the methods
+#           it uses are safe to call from many threads on one shared instance
 
 # Importing Library
-from nltk.corpus import stopwords
+from nltk.corpus import stopwords, wordnet
 from nltk.tokenize import sent_tokenize, word_tokenize
 from nltk.stem.porter import PorterStemmer
 from nltk.tree import Tree
-from nltk import pos_tag,ne_chunk
+from Taggers import posTag,neChunk
 from DateExtractor import extractDate
 import json
 import math
+import random
 import re
+import time
+import zlib
+
+# Bits of entity mask recorded for paragraphs and sentences
+PERSON_MASK = 1
+LOCATION_MASK = 2
+ORGANIZATION_MASK = 4
+DATE_MASK = 8
+
+# Entity mask for label of named entity
+ENTITY_LABEL_MASK = {"PERSON":PERSON_MASK,"GPE":LOCATION_MASK,"ORGANIZATION":ORGANIZATION_MASK}
+
+# Entity mask required by expected answer type
+ANSWER_TYPE_MASK = {"PERSON":PERSON_MASK,"LOCATION":LOCATION_MASK,"ORGANIZATION":ORGANIZATION_MASK,"DATE":DATE_MASK}
+
+# MinHash parameters used to detect near duplicate paragraphs
+MINHASH_PERMUTATIONS = 128
+MINHASH_PRIME = (1 << 61) - 1
+SHINGLE_SIZE = 3
+
+# Check similarity threshold of near duplicate collapsing
+# Input:
+#       threshold(float)    : Threshold, None when paragraphs are kept
+# Output:
+#       threshold(float)    : Same threshold, ValueError unless in range (0, 1]
+def checkDedupThreshold(threshold):
+    if threshold != None and not (0 < threshold <= 1):
+        raise ValueError("dedupThreshold must be greater than 0 and at most 1, got " + str(threshold))
+    return threshold
 
 class DocumentRetrievalModel:
-    def __init__(self,paragraphs,removeStopWord = False,useStemmer = False):
+    def __init__(self,paragraphs,removeStopWord = False,useStemmer = False,useSynonyms = False,useEntityFilter = False,dedupThreshold = None):
+        checkDedupThreshold(dedupThreshold)
         self.idf = {}               # dict to store IDF for words in paragraph
         self.paragraphInfo = {}     # structure to store paragraphVector
+        self.synonymTable = {}      # dict to store synonyms found in paragraph
+        self.duplicates = {}        # dict to store collapsed paragraphs
         self.paragraphs = paragraphs
+        self.paragraphIds = list(range(0,len(paragraphs)))  # kept paragraphs
         self.totalParas = len(paragraphs)
         self.stopwords = stopwords.words('english')
         self.removeStopWord = removeStopWord
         self.useStemmer = useStemmer
+        self.useSynonyms = useSynonyms
+        self.useEntityFilter = useEntityFilter
+        self.dedupThreshold = dedupThreshold
         self.vData = None
         self.stem = lambda k:k.lower()
         if(useStemmer):
@@ -40,15 +95,21 @@ class DocumentRetrievalModel:
             self.stem = ps.stem
             
         # Initialize
+        if dedupThreshold != None:
+            self.collapseDuplicates(dedupThreshold)
+            self.totalParas = len(self.paragraphIds)
         self.computeTFIDF()
+        if useEntityFilter:
+            self.computeEntityMask()
         
     # Return term frequency for Paragraph
     # Input:
-    #       paragraph(str): Paragraph as a whole in string format
+    #       sentences(list): Sentences of paragraph, from getSentences
+    #       vocabulary(set): Optional set collecting lower cased words before
+    #                        stemming
     # Output:
     #       wordFrequence(dict) : Dictionary of word and term frequency
-    def getTermFrequencyCount(self,paragraph):
-        sentences = sent_tokenize(paragraph)
+    def getTermFrequencyCount(self,sentences,vocabulary = None):
         wordFrequency = {}
         for sent in sentences:
             for word in word_tokenize(sent):
@@ -58,6 +119,8 @@ class DocumentRetrievalModel:
                         continue
                     if not re.match(r"[a-zA-Z0-9\-\_\\/\.\']+",word):
                         continue
+                if vocabulary != None:
+                    vocabulary.add(word.lower())
                 #Use of Stemmer
                 if self.useStemmer:
                     word = self.stem(word)
@@ -68,6 +131,87 @@ class DocumentRetrievalModel:
                     wordFrequency[word] = 1
         return wordFrequency
     
+    # Collapses near duplicate paragraphs using MinHash signatures and LSH
+    # banding. Paragraph is compared only with kept paragraphs sharing a band
+    # with it, and is collapsed into first one whose estimated Jaccard
+    # similarity of word shingles reaches threshold
+    # Input:
+    #       threshold(float)    : Minimum estimated similarity of duplicates
+    # Output:
+    #       paragraphIds(list)  : Indexes of kept paragraphs
+    #       duplicates(dict)    : Kept paragraph index and list of indexes of
+    #                             paragraphs collapsed into it
+    def collapseDuplicates(self, threshold):
+        # Same permutations for every build, so result is reproducible
+        rng = random.Random(0)
+        permutations = [(rng.randrange(1,MINHASH_PRIME),rng.randrange(0,MINHASH_PRIME)) for i in range(0,MINHASH_PERMUTATIONS)]
+        (bands, rows) = self.getBands(threshold)
+
+        self.paragraphIds = []
+        self.duplicates = {}
+        signatures = {}
+        buckets = {}
+        for index in range(0,len(self.paragraphs)):
+            signature = self.getMinHash(self.paragraphs[index], permutations)
+            keys = []
+            duplicateOf = None
+            if signature != None:
+                keys = [(b,tuple(signature[b*rows:(b+1)*rows])) for b in range(0,bands)]
+                candidates = set()
+                for key in keys:
+                    candidates.update(buckets.get(key,[]))
+                for candidate in sorted(candidates):
+                    other = signatures[candidate]
+                    agreement = [signature[i] == other[i] for i in range(0,MINHASH_PERMUTATIONS)].count(True)
+                    if agreement / MINHASH_PERMUTATIONS >= threshold:
+                        duplicateOf = candidate
+                        break
+            if duplicateOf != None:
+                self.duplicates[duplicateOf].append(index)
+                continue
+            self.paragraphIds.append(index)
+            self.duplicates[index] = []
+            signatures[index] = signature
+            for key in keys:
+                buckets.setdefault(key,[]).append(index)
+        for index in self.paragraphIds:
+            if len(self.duplicates[index]) == 0:
+                del self.duplicates[index]
+
+    # Choose number of bands and rows per band so that probability curve of
+    # LSH banding is steepest near threshold
+    # Input:
+    #       threshold(float)    : Similarity threshold
+    # Output:
+    #       (bands, rows)       : Number of bands and rows per band
+    def getBands(self, threshold):
+        best = (MINHASH_PERMUTATIONS, 1)
+        bestError = None
+        for rows in range(1,MINHASH_PERMUTATIONS+1):
+            bands = MINHASH_PERMUTATIONS // rows
+            error = abs(math.pow(1/bands, 1/rows) - threshold)
+            if bestError == None or error < bestError:
+                best = (bands, rows)
+                bestError = error
+        return best
+
+    # Compute MinHash signature of paragraph over lower cased word shingles
+    # Input:
+    #       paragraph(str)      : Paragraph string
+    #       permutations(list)  : List of tuple with coefficients of hash
+    #                             permutation
+    # Output:
+    #       signature(list)     : Minimum hash of every permutation, None for
+    #                             paragraph without words
+    def getMinHash(self, paragraph, permutations):
+        words = re.findall(r"\w+", paragraph.lower())
+        if len(words) == 0:
+            return None
+        size = min(SHINGLE_SIZE, len(words))
+        shingles = set([" ".join(words[i:i+size]) for i in range(0,len(words)-size+1)])
+        hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+        return [min([(a*h+b) % MINHASH_PRIME for h in hashes]) for (a,b) in permutations]
+
     # Computes term-frequency inverse document frequency for every token of each
     # paragraph
     # Output:
@@ -77,13 +221,16 @@ class DocumentRetrievalModel:
     def computeTFIDF(self):
         # Compute Term Frequency
         self.paragraphInfo = {}
-        for index in range(0,len(self.paragraphs)):
-            wordFrequency = self.getTermFrequencyCount(self.paragraphs[index])
+        vocabulary = None
+        if self.useSynonyms:
+            vocabulary = set()
+        for index in self.paragraphIds:
+            wordFrequency = self.getTermFrequencyCount(self.getSentences(index),vocabulary)
             self.paragraphInfo[index] = {}
             self.paragraphInfo[index]['wF'] = wordFrequency
         
         wordParagraphFrequency = {}
-        for index in range(0,len(self.paragraphInfo)):
+        for index in self.paragraphInfo:
             for word in self.paragraphInfo[index]['wF'].keys():
                 if word in wordParagraphFrequency.keys():
                     wordParagraphFrequency[word] += 1
@@ -96,10 +243,83 @@ class DocumentRetrievalModel:
             self.idf[word] = math.log((self.totalParas+1)/wordParagraphFrequency[word])
         
         #Compute Paragraph Vector
-        for index in range(0,len(self.paragraphInfo)):
+        for index in self.paragraphInfo:
             self.paragraphInfo[index]['vector'] = {}
             for word in self.paragraphInfo[index]['wF'].keys():
                 self.paragraphInfo[index]['vector'][word] = self.paragraphInfo[index]['wF'][word] * self.idf[word]
+
+        if self.useSynonyms:
+            self.buildSynonymTable(vocabulary)
+
+    # Records entity types and dates present in every paragraph and sentence
+    # Output:
+    #       paragraphInfo(dict): Following keys are added for every paragraph
+    #                               mask : entity mask of paragraph
+    #                               sentenceMask : list of entity mask of
+    #                                              every sentence
+    def computeEntityMask(self):
+        for index in self.paragraphInfo:
+            sentenceMask = [self.getEntityMask(sent) for sent in self.getSentences(index)]
+            mask = 0
+            for m in sentenceMask:
+                mask |= m
+            self.paragraphInfo[index]['mask'] = mask
+            self.paragraphInfo[index]['sentenceMask'] = sentenceMask
+
+    # Compute entity mask of sentence
+    # Input:
+    #       sentence(str)   : Sentence string
+    # Output:
+    #       mask(int)       : Bits of entity types and date found in sentence
+    def getEntityMask(self, sentence):
+        mask = 0
+        for entity in self.iterNamedEntity([sentence]):
+            mask |= ENTITY_LABEL_MASK.get(entity[0],0)
+        if len(extractDate(sentence)) > 0:
+            mask |= DATE_MASK
+        return mask
+
+    # Entity mask a candidate must have to contain expected answer type
+    # Input:
+    #       aType(str)  : Expected answer type
+    # Output:
+    #       mask(int)   : Required bits, 0 when candidates are not filtered
+    def getRequiredMask(self, aType):
+        if not self.useEntityFilter:
+            return 0
+        return ANSWER_TYPE_MASK.get(aType,0)
+
+    # Builds synonym table for query expansion. For every word of paragraphs,
+    # it is registered as synonym of all WordNet lemmas sharing a synset with
+    # it. Hence table only expands to words having IDF, and question word is
+    # looked up without WordNet at query time. Lemmas are keyed by their
+    # Porter stem, so inflected question words find them as well
+    # Input:
+    #       vocabulary(set)     : Lower cased words of paragraphs
+    # Output:
+    #       synonymTable(dict)  : Dictionary of stem and list of synonyms
+    def buildSynonymTable(self, vocabulary):
+        ps = PorterStemmer()
+        table = {}
+        for word in vocabulary:
+            term = word
+            if self.useStemmer:
+                term = self.stem(word)
+            if term not in self.idf:
+                continue
+            wordStem = ps.stem(word)
+            for syn in wordnet.synsets(word):
+                for l in syn.lemmas():
+                    for w in l.name().lower().split("_"):
+                        key = ps.stem(w)
+                        if key == wordStem:
+                            continue
+                        if key not in table:
+                            table[key] = set()
+                        table[key].add(word)
+        self.synonymTable = {}
+        for w in table:
+            self.synonymTable[w] = sorted(table[w])
     
 
     # To find answer to the question by first finding relevant paragraph, then
@@ -107,24 +327,78 @@ class DocumentRetrievalModel:
     # based on expected answer type
     # Input:
     #           pQ(ProcessedQuestion) : Instance of ProcessedQuestion
+    #           timeBudget(float)     : Seconds available to answer, None for
+    #                                   no limit
     # Output:
     #           answer(str) : Response of QA System
-    def query(self,pQ):
+    def query(self,pQ,timeBudget = None):
+        return self.queryWithStatus(pQ,timeBudget)["answer"]
+
+    # Same as query, but time budget is checked between stages and before
+    # tagging every sentence. When budget runs out, best answer found so far
+    # is returned, i.e. top ranked sentence without entity extraction, or
+    # first candidate sentence when time ran out before sentences are ranked
+    # Input:
+    #           pQ(ProcessedQuestion) : Instance of ProcessedQuestion
+    #           timeBudget(float)     : Seconds available to answer, None for
+    #                                   no limit
+    # Output:
+    #           result(dict) : Dictionary with following keys
+    #                               answer : Response of QA System
+    #                               degraded : True if answer processing was
+    #                                          cut short by time budget
+    #                               elapsed : Seconds spent on question
+    def queryWithStatus(self,pQ,timeBudget = None):
+        start = time.monotonic()
+        deadline = None
+        if timeBudget != None:
+            deadline = start + timeBudget
+        status = {"degraded":False}
+        answer = self.findAnswer(pQ,deadline,status)
+        return {"answer":answer,"degraded":status["degraded"],"elapsed":time.monotonic() - start}
+
+    # Answer processing of query
+    # Input:
+    #           pQ(ProcessedQuestion) : Instance of ProcessedQuestion
+    #           deadline(float)       : time.monotonic() value after which
+    #                                   processing is cut short, None for no
+    #                                   limit
+    #           status(dict)          : degraded key is set when processing
+    #                                   is cut short
+    # Output:
+    #           answer(str) : Response of QA System
+    def findAnswer(self,pQ,deadline,status):
         
         # Get relevant Paragraph
-        relevantParagraph = self.getSimilarParagraph(pQ.qVector)
+        relevantParagraph = self.getSimilarParagraph(pQ.qVector,pQ.aType)
 
-        # Get All sentences
+        # Get All sentences, skipping sentences without expected entity type
+        # unless no sentence has it
+        requiredMask = self.getRequiredMask(pQ.aType)
         sentences = []
+        candidates = []
         for tup in relevantParagraph:
             if tup != None:
-                p2 = self.paragraphs[tup[0]]
-                sentences.extend(sent_tokenize(p2))
+                paraSentences = self.getSentences(tup[0])
+                sentences.extend(paraSentences)
+                if requiredMask:
+                    sentenceMask = self.paragraphInfo[tup[0]]['sentenceMask']
+                    for index in range(0,len(paraSentences)):
+                        if sentenceMask[index] & requiredMask:
+                            candidates.append(paraSentences[index])
+        if len(candidates) > 0:
+            sentences = candidates
         
         # Get Relevant Sentences
         if len(sentences) == 0:
             return "Oops! Unable to find answer"
 
+        # Out of time before ranking, first sentence of most similar paragraph
+        # or, with entity filter, first sentence having expected entity type
+        if self.isExpired(deadline):
+            status["degraded"] = True
+            return sentences[0]
+
         # Get most relevant sentence using unigram similarity
         relevantSentences = self.getMostRelevantSentences(sentences,pQ,1)
 
@@ -134,83 +408,105 @@ class DocumentRetrievalModel:
         # Default Answer
         answer = relevantSentences[0][0]
 
+        # Sentences are tagged lazily in ranked order, so extraction stops at
+        # first sentence yielding an accepted candidate or when out of time
+        rankedSentences = self.iterBeforeDeadline((s[0] for s in relevantSentences),deadline,status)
+
+        # Stems of question tokens, used to reject candidate already in question
         ps = PorterStemmer()
+        qStems = set([ps.stem(w) for w in word_tokenize(pQ.question.lower())])
+
         # For question type looking for Person
         if aType == "PERSON":
-            ne = self.getNamedEntity([s[0] for s in relevantSentences])
-            for entity in ne:
-                if entity[0] == "PERSON":
-                    answer = entity[1]
-                    answerTokens = [ps.stem(w) for w in word_tokenize(answer.lower())]
-                    qTokens = [ps.stem(w) for w in word_tokenize(pQ.question.lower())]
-                    # If any entity is already in question
-                    if [(a in qTokens) for a in answerTokens].count(True) >= 1:
-                        continue
-                    break
+            ne = self.iterNamedEntity(rankedSentences)
+            answer = self.getFirstCandidate(ne, ["PERSON"], qStems, answer)
         elif aType == "LOCATION":
-            ne = self.getNamedEntity([s[0] for s in relevantSentences])
-            for entity in ne:
-                if entity[0] == "GPE":
-                    answer = entity[1]
-                    answerTokens = [ps.stem(w) for w in word_tokenize(answer.lower())]
-                    qTokens = [ps.stem(w) for w in word_tokenize(pQ.question.lower())]
-                    # If any entity is already in question
-                    if [(a in qTokens) for a in answerTokens].count(True) >= 1:
-                        continue
-                    break
+            ne = self.iterNamedEntity(rankedSentences)
+            answer = self.getFirstCandidate(ne, ["GPE"], qStems, answer)
         elif aType == "ORGANIZATION":
-            ne = self.getNamedEntity([s[0] for s in relevantSentences])
-            for entity in ne:
-                if entity[0] == "ORGANIZATION":
-                    answer = entity[1]
-                    answerTokens = [ps.stem(w) for w in word_tokenize(answer.lower())]
-                    # If any entity is already in question
-                    qTokens = [ps.stem(w) for w in word_tokenize(pQ.question.lower())]
-                    if [(a in qTokens) for a in answerTokens].count(True) >= 1:
-                        continue
-                    break
+            ne = self.iterNamedEntity(rankedSentences)
+            answer = self.getFirstCandidate(ne, ["ORGANIZATION"], qStems, answer)
         elif aType == "DATE":
-            allDates = []
-            for s in relevantSentences:
-                allDates.extend(extractDate(s[0]))
-            if len(allDates)>0:
-                answer = allDates[0]
-        elif aType in ["NN","NNP"]:
-            candidateAnswers = []
-            ne = self.getContinuousChunk([s[0] for s in relevantSentences])
-            for entity in ne:
-                if aType == "NN":
-                    if entity[0] == "NN" or entity[0] == "NNS":
-                        answer = entity[1]
-                        answerTokens = [ps.stem(w) for w in word_tokenize(answer.lower())]
-                        qTokens = [ps.stem(w) for w in word_tokenize(pQ.question.lower())]
-                        # If any entity is already in question
-                        if [(a in qTokens) for a in answerTokens].count(True) >= 1:
-                            continue
-                        break
-                elif aType == "NNP":
-                    if entity[0] == "NNP" or entity[0] == "NNPS":
-                        answer = entity[1]
-                        answerTokens = [ps.stem(w) for w in word_tokenize(answer.lower())]
-                        qTokens = [ps.stem(w) for w in word_tokenize(pQ.question.lower())]
-                        # If any entity is already in question
-                        if [(a in qTokens) for a in answerTokens].count(True) >= 1:
-                            continue
-                        break
-        elif aType == "DEFINITION":
-            relevantSentences = self.getMostRelevantSentences(sentences,pQ,1)
-            answer = relevantSentences[0][0]
+            for sent in rankedSentences:
+                dates = extractDate(sent)
+                if len(dates)>0:
+                    answer = dates[0]
+                    break
+        elif aType == "NN":
+            ne = self.iterContinuousChunk(rankedSentences)
+            answer = self.getFirstCandidate(ne, ["NN","NNS"], qStems, answer)
+        elif aType == "NNP":
+            ne = self.iterContinuousChunk(rankedSentences)
+            answer = self.getFirstCandidate(ne, ["NNP","NNPS"], qStems, answer)
+        return answer
+
+    # Check whether deadline has passed
+    # Input:
+    #       deadline(float) : time.monotonic() value, None for no limit
+    # Output:
+    #       expired(boolean): True if deadline has passed
+    def isExpired(self, deadline):
+        return deadline != None and time.monotonic() >= deadline
+
+    # Yield items until deadline passes, then mark status as degraded
+    # Input:
+    #       items(iterable) : Items to yield
+    #       deadline(float) : time.monotonic() value, None for no limit
+    #       status(dict)    : degraded key is set when items are cut short
+    # Output:
+    #       items(generator): Items yielded before deadline
+    def iterBeforeDeadline(self, items, deadline, status):
+        for item in items:
+            if self.isExpired(deadline):
+                status["degraded"] = True
+                return
+            yield item
+
+    # Pick first candidate of expected type which is not already part of the
+    # question. Candidates are consumed lazily and consumption stops as soon as
+    # a candidate is accepted
+    # Input:
+    #       candidates(iterator): Tuples of label and text in ranked order
+    #       labels(list)        : Labels of expected answer type
+    #       qStems(set)         : Stemmed tokens of question
+    #       answer(str)         : Default answer
+    # Output:
+    #       answer(str)         : Accepted candidate, otherwise last candidate
+    #                             of expected type or default answer
+    def getFirstCandidate(self, candidates, labels, qStems, answer):
+        ps = PorterStemmer()
+        for entity in candidates:
+            if entity[0] in labels:
+                answer = entity[1]
+                answerTokens = [ps.stem(w) for w in word_tokenize(answer.lower())]
+                # If any entity is already in question
+                if [(a in qStems) for a in answerTokens].count(True) >= 1:
+                    continue
+                break
         return answer
         
+    # Get sentences of paragraph. CorpusStore slices already recorded sentence
+    # offsets, plain list of paragraphs is tokenized on demand
+    # Input:
+    #       index(int)      : Paragraph index
+    # Output:
+    #       sentences(list) : List of sentences in order of occurance
+    def getSentences(self, index):
+        if hasattr(self.paragraphs, "getSentences"):
+            return self.paragraphs.getSentences(index)
+        return sent_tokenize(self.paragraphs[index])
+
     # Get top 3 relevant paragraph based on cosine similarity between question 
-    # vector and paragraph vector
+    # vector and paragraph vector. With entity filter, paragraphs without
+    # entity of expected answer type are skipped unless no paragraph has it
     # Input :
     #       queryVector(dict) : Dictionary of words in question with their 
     #                           frequency
+    #       aType(str)        : Expected answer type, None to rank all
     # Output:
     #       pRanking(list) : List of tuple with top 3 paragraph with its
     #                        similarity coefficient
-    def getSimilarParagraph(self,queryVector):    
+    def getSimilarParagraph(self,queryVector,aType = None):    
         queryVectorDistance = 0
         for word in queryVector.keys():
             if word in self.idf.keys():
@@ -218,10 +514,15 @@ class DocumentRetrievalModel:
         queryVectorDistance = math.pow(queryVectorDistance,0.5)
         if queryVectorDistance == 0:
             return [None]
+        requiredMask = self.getRequiredMask(aType)
         pRanking = []
-        for index in range(0,len(self.paragraphInfo)):
+        for index in self.paragraphInfo:
+            if requiredMask and not self.paragraphInfo[index]['mask'] & requiredMask:
+                continue
             sim = self.computeSimilarity(self.paragraphInfo[index], queryVector, queryVectorDistance)
             pRanking.append((index,sim))
+        if requiredMask and len(pRanking) == 0:
+            return self.getSimilarParagraph(queryVector)
         
         return sorted(pRanking,key=lambda tup: (tup[1],tup[0]), reverse=True)[:3]
     
@@ -329,10 +630,18 @@ class DocumentRetrievalModel:
     #       chunks(list)        : List of tuple with entity and name in ranked 
     #                             order
     def getNamedEntity(self,answers):
-        chunks = []
+        return list(self.iterNamedEntity(answers))
+
+    # Lazy version of getNamedEntity, sentence is tagged only when its
+    # entities are requested
+    # Input:
+    #       answers(iterable)   : Potential sentences containing answer
+    # Output:
+    #       chunks(generator)   : Tuples of entity and name in ranked order
+    def iterNamedEntity(self,answers):
         for answer in answers:
             answerToken = word_tokenize(answer)
-            nc = ne_chunk(pos_tag(answerToken))
+            nc = neChunk(posTag(answerToken))
             entity = {"label":None,"chunk":[]}
             for c_node in nc:
                 if(type(c_node) == Tree):
@@ -345,11 +654,10 @@ class DocumentRetrievalModel:
                         entity["chunk"].append(token)
                     else:
                         if not len(entity["chunk"]) == 0:
-                            chunks.append((entity["label"]," ".join(entity["chunk"])))
+                            yield (entity["label"]," ".join(entity["chunk"]))
                             entity = {"label":None,"chunk":[]}
             if not len(entity["chunk"]) == 0:
-                chunks.append((entity["label"]," ".join(entity["chunk"])))
-        return chunks
+                yield (entity["label"]," ".join(entity["chunk"]))
     
     # To get continuous chunk of similar POS tags.
     # E.g.  If two NN tags are consequetive, this method will merge and return
@@ -361,12 +669,20 @@ class DocumentRetrievalModel:
     # Output:
     #       chunks(list)  : list of tuple with entity and name in ranked order
     def getContinuousChunk(self,answers):
-        chunks = []
+        return list(self.iterContinuousChunk(answers))
+
+    # Lazy version of getContinuousChunk, sentence is tagged only when its
+    # chunks are requested
+    # Input:
+    #       answers(iterable) : Potential sentence strings
+    # Output:
+    #       chunks(generator) : Tuples of entity and name in ranked order
+    def iterContinuousChunk(self,answers):
         for answer in answers:
             answerToken = word_tokenize(answer)
             if(len(answerToken)==0):
                 continue
-            nc = pos_tag(answerToken)
+            nc = posTag(answerToken)
             
             prevPos = nc[0][1]
             entity = {"pos":prevPos,"chunk":[]}
@@ -381,22 +697,36 @@ class DocumentRetrievalModel:
                     entity["chunk"].append(token)
                 else:
                     if not len(entity["chunk"]) == 0:
-                        chunks.append((entity["pos"]," ".join(entity["chunk"])))
+                        yield (entity["pos"]," ".join(entity["chunk"]))
                         entity = {"pos":pos,"chunk":[token]}
                         prevPos = pos
             if not len(entity["chunk"]) == 0:
-                chunks.append((entity["pos"]," ".join(entity["chunk"])))
-        return chunks
+                yield (entity["pos"]," ".join(entity["chunk"]))
     
     def getqRev(self, pq):
-        if self.vData == None:
-            # For testing purpose
-            self.vData = json.loads(open("validatedata.py","r").readline())
+        vData = self.vData
+        if vData == None:
+            # For testing purpose, read without storing on model to keep
+            # query path free of mutation
+            vData = json.loads(open("validatedata.py","r").readline())
         revMatrix = []
-        for t in self.vData:
+        for t in vData:
             sent = t["q"]
             revMatrix.append((t["a"],self.sim_sentence(pq.qVector,sent)))
         return sorted(revMatrix,key=lambda tup:(tup[1],tup[0]),reverse=True)[0][0]
+
+    # Stemmer is not pickled, it is rebuilt from useStemmer on unpickling
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['stem']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.stem = lambda k:k.lower()
+        if(self.useStemmer):
+            ps = PorterStemmer()
+            self.stem = ps.stem
         
     def __repr__(self):
         msg = "Total Paras " + str(self.totalParas) + "\n"
@@ -0,0 +1,41 @@
+# ScriptName : LatencyStats.py
+# Description : Helpers to summarize latency samples collected by evaluation
+#               and load testing scripts
+
+import math
+
+# Percentile of samples using nearest rank method
+# Input:
+#       values(list)    : List of samples
+#       p(float)        : Percentile between 0 and 100
+# Output:
+#       value(float)    : Sample at given percentile, None if no sample
+def percentile(values, p):
+    if len(values) == 0:
+        return None
+    ordered = sorted(values)
+    rank = int(math.ceil(p / 100.0 * len(ordered)))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+# Summarize latency samples
+# Input:
+#       latencies(list) : List of latency in seconds
+#       duration(float) : Wall clock duration of run in seconds, used to
+#                         compute throughput
+# Output:
+#       summary(dict)   : Count, throughput and latency percentiles in
+#                         milliseconds
+def summarizeLatencies(latencies, duration = None):
+    summary = {"count": len(latencies)}
+    if duration != None:
+        summary["throughput"] = round(len(latencies) / duration, 3) if duration > 0 else None
+    if len(latencies) == 0:
+        summary.update({"meanMs": None, "p50Ms": None, "p95Ms": None, "p99Ms": None, "maxMs": None})
+        return summary
+    toMs = lambda v: round(v * 1000, 3)
+    summary["meanMs"] = toMs(sum(latencies) / len(latencies))
+    summary["p50Ms"] = toMs(percentile(latencies, 50))
+    summary["p95Ms"] = toMs(percentile(latencies, 95))
+    summary["p99Ms"] = toMs(percentile(latencies, 99))
+    summary["maxMs"] = toMs(max(latencies))
+    return summary
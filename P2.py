@@ -3,40 +3,165 @@
 # Description : Entry point for Simple Question Answer Chatbot
 # Program Argument :
 #		datasetName = "Name of dataset text file" eg. "Beyonce.txt"
+#		--batch = Answer questions from file or stdin instead of chatting.
+#			Each input line is a question or JSON object with "question" and
+#			optional "id". Answers are written as JSON lines in input order
+#		--input, --output = Files for batch mode, stdin and stdout by default
+#		--workers = Number of threads answering questions in batch mode
+#		--window = Maximum number of questions in flight in batch mode
+#		--dedup = Similarity threshold above which near duplicate paragraphs
+#			are collapsed into one
+#		--synonyms = Expand questions with synonyms found in dataset
+#		--entity-filter = Skip paragraphs and sentences without entity of
+#			expected answer type
+#		--time-budget = Seconds available per question. When exceeded, best
+#			answer so far is returned, marked as degraded in batch mode
 # Usage :
 #		$ python3 P2.py dataset/IPod
+#		$ python3 P2.py dataset/USB.txt --batch --input questions.txt --workers 8
 
-print("Bot> Please wait, while I am loading my dependencies")
-from DocumentRetrievalModel import DocumentRetrievalModel as DRM
+import argparse
+import sys
+
+parser = argparse.ArgumentParser(add_help = True)
+parser.add_argument("datasetName", nargs = "?")
+parser.add_argument("--batch", action = "store_true")
+parser.add_argument("--input", default = "-")
+parser.add_argument("--output", default = "-")
+parser.add_argument("--workers", type = int, default = 4)
+parser.add_argument("--window", type = int, default = None)
+parser.add_argument("--dedup", type = float, default = None)
+parser.add_argument("--synonyms", action = "store_true")
+parser.add_argument("--entity-filter", action = "store_true")
+parser.add_argument("--time-budget", type = float, default = None)
+args = parser.parse_args()
+
+# In batch mode stdout carries answers only, messages go to stderr
+def say(*msg):
+	print(*msg, file = sys.stderr if args.batch else sys.stdout)
+
+say("Bot> Please wait, while I am loading my dependencies")
+from DocumentRetrievalModel import DocumentRetrievalModel as DRM, checkDedupThreshold
 from ProcessedQuestion import ProcessedQuestion as PQ
+from CorpusStore import CorpusStore as CS
+from QueryExecutor import QueryExecutor as QE
+from collections import deque
+import json
 import re
-import sys
 
-if len(sys.argv) == 1:
-	print("Bot> I need some reference to answer your question")
-	print("Bot> Please! Rerun me using following syntax")
-	print("\t\t$ python3 P2.py <datasetName>")
-	print("Bot> You can find dataset name in \"dataset\" folder")
-	print("Bot> Thanks! Bye")
+if args.datasetName == None:
+	say("Bot> I need some reference to answer your question")
+	say("Bot> Please! Rerun me using following syntax")
+	say("\t\t$ python3 P2.py <datasetName>")
+	say("Bot> You can find dataset name in \"dataset\" folder")
+	say("Bot> Thanks! Bye")
 	exit()
 
-datasetName = sys.argv[1]
-# Loading Dataset
+# Bad threshold is reported before dataset is loaded
+try:
+	checkDedupThreshold(args.dedup)
+except ValueError as e:
+	parser.error(str(e))
+
+datasetName = args.datasetName
+# Questions file of batch mode is opened before paragraphs are processed, so
+# wrong path is reported without waiting for indexing
+inputFile = sys.stdin
+if args.batch and args.input != "-":
+	try:
+		inputFile = open(args.input, "r")
+	except FileNotFoundError:
+		say("Bot> Oops! I am unable to locate \"" + args.input + "\"")
+		exit()
+
+# Loading Dataset : Assumption is that each paragraph in dataset is
+# separated by new line character. Paragraphs and sentences are sliced on
+# demand from memory mapped dataset file
 try:
-	datasetFile = open(datasetName,"r")
+	paragraphs = CS(datasetName)
 except FileNotFoundError:
-	print("Bot> Oops! I am unable to locate \"" + datasetName + "\"")
+	say("Bot> Oops! I am unable to locate \"" + datasetName + "\"")
 	exit()
 
-# Retrieving paragraphs : Assumption is that each paragraph in dataset is
-# separated by new line character
-paragraphs = []
-for para in datasetFile.readlines():
-	if(len(para.strip()) > 0):
-		paragraphs.append(para.strip())
-
 # Processing Paragraphs
-drm = DRM(paragraphs,True,True)
+drm = DRM(paragraphs,True,True,args.synonyms,args.entity_filter,args.dedup)
+synonymTable = drm.synonymTable if args.synonyms else None
+
+# Read questions for batch mode
+# Input:
+#		inputFile(file)	: File with question or JSON object on every line
+# Output:
+#		records(generator)	: Tuple of id, question and parsing error
+def readQuestions(inputFile):
+	lineNo = 0
+	for line in inputFile:
+		lineNo += 1
+		line = line.strip()
+		if len(line) == 0:
+			continue
+		if not line.startswith("{"):
+			yield (lineNo, line, None)
+			continue
+		try:
+			record = json.loads(line)
+		except ValueError as e:
+			yield (lineNo, None, "Invalid question record: " + str(e))
+			continue
+		qId = record.get("id", lineNo)
+		if not isinstance(record.get("question"), str):
+			yield (qId, None, "Invalid question record: missing question")
+			continue
+		yield (qId, record["question"], None)
+
+# Answer questions in batch mode. At most window questions are in flight,
+# answers are written as soon as all previous answers are written
+# Input:
+#		inputFile(file)		: Questions
+#		outputFile(file)	: JSON lines of answers
+#		workers(int)		: Number of threads
+#		window(int)			: Maximum number of questions in flight
+def runBatch(inputFile, outputFile, workers, window):
+	pending = deque()
+
+	def emit(item):
+		(qId, question, future, error) = item
+		record = {"id":qId, "question":question}
+		if future != None:
+			try:
+				result = future.result()
+				record["answer"] = result["answer"]
+				record["degraded"] = result["degraded"]
+			except Exception as e:
+				error = type(e).__name__ + ": " + str(e)
+		if error != None:
+			record["error"] = error
+		outputFile.write(json.dumps(record) + "\n")
+		outputFile.flush()
+
+	with QE(drm, workers, useSynonyms = args.synonyms, timeBudget = args.time_budget) as qe:
+		for (qId, question, error) in readQuestions(inputFile):
+			if len(pending) >= window:
+				emit(pending.popleft())
+			future = None
+			if error == None:
+				future = qe.submitWithStatus(question)
+			pending.append((qId, question, future, error))
+		while len(pending) > 0:
+			emit(pending.popleft())
+
+if args.batch:
+	workers = max(args.workers, 1)
+	window = args.window if args.window != None else 4*workers
+	outputFile = sys.stdout if args.output == "-" else open(args.output, "w")
+	say("Bot> Answering questions from " + ("stdin" if args.input == "-" else args.input))
+	runBatch(inputFile, outputFile, workers, max(window, 1))
+	if inputFile != sys.stdin:
+		inputFile.close()
+	if outputFile != sys.stdout:
+		outputFile.close()
+	paragraphs.close()
+	say("Bot> Done")
+	exit()
 
 print("Bot> Hey! I am ready. Ask me factoid based questions only :P")
 print("Bot> You can say me Bye anytime you want")
@@ -57,8 +182,10 @@ while isActive:
 		isActive = False
 	else:
 		# Proocess Question
-		pq = PQ(userQuery,True,False,True)
+		pq = PQ(userQuery,True,args.synonyms,True,synonymTable)
 
 		# Get Response From Bot
-		response =drm.query(pq)
-	print("Bot>",response)
\ No newline at end of file
+		response =drm.query(pq,args.time_budget)
+	print("Bot>",response)
+
+paragraphs.close()
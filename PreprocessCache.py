@@ -0,0 +1,146 @@
+# ScriptName : PreprocessCache.py
+# Description : Local on-disk cache of built DocumentRetrievalModel and
+#               ProcessedQuestion instances. Entries are addressed by hash of
+#               their content (paragraphs or question string) together with
+#               pipeline configuration, so only changed topics and questions
+#               are processed again on rerun.
+#               Hash of preprocessing source files is part of every address,
+#               so editing them invalidates all entries.
+# Arguments :
+#       Input :
+#           cacheDir(str) : Directory to store cache entries
+#       Output :
+#           Instance of PreprocessCache with following structure
+#               getModel(function)    : Return DocumentRetrievalModel for
+#                                       paragraphs and whether it was loaded
+#                                       from cache
+#               getQuestion(function) : Return ProcessedQuestion for question
+
+from DocumentRetrievalModel import DocumentRetrievalModel
+from ProcessedQuestion import ProcessedQuestion
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+# Source files whose code produces cached entries
+SOURCE_FILES = ["DocumentRetrievalModel.py", "ProcessedQuestion.py", "DateExtractor.py", "Taggers.py"]
+
+# Hash of source files
+# Output:
+#       digest(str) : Hex digest of content of SOURCE_FILES
+def getSourceDigest():
+    h = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in SOURCE_FILES:
+        with open(os.path.join(directory, name), "rb") as sourceFile:
+            data = sourceFile.read()
+        h.update((name + ":" + str(len(data)) + ":").encode("utf-8"))
+        h.update(data)
+    return h.hexdigest()
+
+class PreprocessCache:
+    def __init__(self, cacheDir = ".qa_cache"):
+        self.cacheDir = cacheDir
+        self.sourceDigest = getSourceDigest()
+        self.hits = 0
+        self.misses = 0
+        self.tableDigests = {}  # id of synonym table and its digest
+
+    # Get model of paragraphs, building and storing it on cache miss
+    # Input:
+    #       paragraphs(list)        : List of paragraphs
+    #       removeStopWord(boolean) : Same as DocumentRetrievalModel
+    #       useStemmer(boolean)     : Same as DocumentRetrievalModel
+    #       useSynonyms(boolean)    : Same as DocumentRetrievalModel
+    #       useEntityFilter(boolean): Same as DocumentRetrievalModel
+    #       dedupThreshold(float)   : Same as DocumentRetrievalModel
+    # Output:
+    #       drm(DocumentRetrievalModel) : Built model
+    #       cached(boolean)             : True if model was loaded from cache
+    def getModel(self, paragraphs, removeStopWord = False, useStemmer = False, useSynonyms = False, useEntityFilter = False, dedupThreshold = None):
+        config = [removeStopWord, useStemmer, useSynonyms, useEntityFilter, dedupThreshold]
+        key = self.getKey("model", paragraphs, config)
+        build = lambda: DocumentRetrievalModel(list(paragraphs), removeStopWord, useStemmer, useSynonyms, useEntityFilter, dedupThreshold)
+        return self.getOrBuild("model", key, build)
+
+    # Get processed question, processing and storing it on cache miss
+    # Input:
+    #       question(str)               : Question string
+    #       useStemmer(boolean)         : Same as ProcessedQuestion
+    #       useSynonyms(boolean)        : Same as ProcessedQuestion
+    #       removeStopwords(boolean)    : Same as ProcessedQuestion
+    #       synonymTable(dict)          : Same as ProcessedQuestion
+    # Output:
+    #       pq(ProcessedQuestion)       : Processed question
+    def getQuestion(self, question, useStemmer = False, useSynonyms = False, removeStopwords = False, synonymTable = None):
+        config = [useStemmer, useSynonyms, removeStopwords, self.getTableDigest(synonymTable)]
+        key = self.getKey("question", [question], config)
+        build = lambda: ProcessedQuestion(question, useStemmer, useSynonyms, removeStopwords, synonymTable)
+        return self.getOrBuild("question", key, build)[0]
+
+    # Digest of synonym table, computed once per table as same table is used
+    # for every question of topic
+    # Input:
+    #       synonymTable(dict)  : Synonym table or None
+    # Output:
+    #       digest(str)         : Hex digest, None for no table
+    def getTableDigest(self, synonymTable):
+        if synonymTable == None:
+            return None
+        if id(synonymTable) not in self.tableDigests:
+            data = json.dumps(synonymTable, sort_keys = True).encode("utf-8")
+            # Table is kept referenced, so its id is not reused
+            self.tableDigests[id(synonymTable)] = (synonymTable, hashlib.sha256(data).hexdigest())
+        return self.tableDigests[id(synonymTable)][1]
+
+    # Compute content address of entry
+    # Input:
+    #       kind(str)       : Kind of entry, model or question
+    #       texts(list)     : Content strings
+    #       config(list)    : Pipeline configuration flags
+    # Output:
+    #       key(str)        : Hex digest
+    def getKey(self, kind, texts, config):
+        h = hashlib.sha256()
+        h.update((kind + ":" + self.sourceDigest + ":" + repr(config) + "\n").encode("utf-8"))
+        for text in texts:
+            data = text.encode("utf-8")
+            h.update(str(len(data)).encode("utf-8") + b":")
+            h.update(data)
+        return h.hexdigest()
+
+    def getPath(self, kind, key):
+        return os.path.join(self.cacheDir, kind, key[:2], key + ".pickle")
+
+    # Load entry from cache, otherwise build it and store it atomically.
+    # Unreadable entry is treated as cache miss
+    # Output:
+    #       (value, cached) : Entry and True if it was loaded from cache
+    def getOrBuild(self, kind, key, build):
+        path = self.getPath(kind, key)
+        if os.path.exists(path):
+            try:
+                with open(path, "rb") as cacheFile:
+                    value = pickle.load(cacheFile)
+                self.hits += 1
+                return (value, True)
+            except Exception:
+                pass
+        self.misses += 1
+        value = build()
+        os.makedirs(os.path.dirname(path), exist_ok = True)
+        tmp = tempfile.NamedTemporaryFile(dir = os.path.dirname(path), delete = False)
+        try:
+            with tmp:
+                pickle.dump(value, tmp, protocol = pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp.name, path)
+        except Exception:
+            if os.path.exists(tmp.name):
+                os.remove(tmp.name)
+            raise
+        return (value, False)
+
+    def __repr__(self):
+        return "Cache " + self.cacheDir + " hits " + str(self.hits) + " misses " + str(self.misses)
@@ -9,6 +9,9 @@
 #           useSynonyms(boolean) : Indicate to use thesaraus for query expansion
 #           removeStopwords(boolean) : Indicate to remove stop words from search
 #                                      query
+#           synonymTable(dict) : Precomputed synonym table of
+#                                DocumentRetrievalModel used for query expansion
+#                                instead of WordNet, keyed by Porter stem
 #       Output :
 #           Instance of ProcessedQuestion with useful following structure
 #               qVector(dict) : Key Value pair of word and its frequency
@@ -20,12 +23,13 @@
 #                       ["PERSON","LOCATION","DATE","DEFINITION","YESNO"]
 #               
 
-from nltk import pos_tag,word_tokenize,ne_chunk
+from nltk import word_tokenize
+from Taggers import posTag
 from nltk.stem.porter import PorterStemmer
 from nltk.corpus import wordnet,stopwords
 
 class ProcessedQuestion:
-    def __init__(self, question, useStemmer = False, useSynonyms = False, removeStopwords = False):
+    def __init__(self, question, useStemmer = False, useSynonyms = False, removeStopwords = False, synonymTable = None):
         self.question = question
         self.useStemmer = useStemmer
         self.useSynonyms = useSynonyms
@@ -36,7 +40,9 @@ class ProcessedQuestion:
             ps = PorterStemmer()
             self.stem = ps.stem
         self.qType = self.determineQuestionType(question)
-        self.searchQuery = self.buildSearchQuery(question)
+        # Synonym table is only needed here and is not kept, so pickled and
+        # cached questions do not carry table of whole topic
+        self.searchQuery = self.buildSearchQuery(question, synonymTable)
         self.qVector = self.getQueryVector(self.searchQuery)
         self.aType = self.determineAnswerType(question)
     
@@ -53,7 +59,7 @@ class ProcessedQuestion:
     #                     WRB -> where ]
     def determineQuestionType(self, question):
         questionTaggers = ['WP','WDT','WP$','WRB']
-        qPOS = pos_tag(word_tokenize(question))
+        qPOS = posTag(word_tokenize(question))
         qTags = []
         for token in qPOS:
             if token[1] in questionTaggers:
@@ -77,7 +83,7 @@ class ProcessedQuestion:
     #                   FULL]
     def determineAnswerType(self, question):
         questionTaggers = ['WP','WDT','WP$','WRB']
-        qPOS = pos_tag(word_tokenize(question))
+        qPOS = posTag(word_tokenize(question))
         qTag = None
 
         for token in qPOS:
@@ -133,10 +139,11 @@ class ProcessedQuestion:
     #
     # Input:
     #           question(str) : Question string
+    #           synonymTable(dict) : Same as constructor
     # Output:
     #           searchQuery(list) : List of tokens
-    def buildSearchQuery(self, question):
-        qPOS = pos_tag(word_tokenize(question))
+    def buildSearchQuery(self, question, synonymTable = None):
+        qPOS = posTag(word_tokenize(question))
         searchQuery = []
         questionTaggers = ['WP','WDT','WP$','WRB']
         for tag in qPOS:
@@ -145,7 +152,7 @@ class ProcessedQuestion:
             else:
                 searchQuery.append(tag[0])
                 if(self.useSynonyms):
-                    syn = self.getSynonyms(tag[0])
+                    syn = self.getSynonyms(tag[0], synonymTable)
                     if(len(syn) > 0):
                         searchQuery.extend(syn)
         return searchQuery
@@ -181,7 +188,7 @@ class ProcessedQuestion:
     def getContinuousChunk(self,question):
         chunks = []
         answerToken = word_tokenize(question)
-        nc = pos_tag(answerToken)
+        nc = posTag(answerToken)
 
         prevPos = nc[0][1]
         entity = {"pos":prevPos,"chunk":[]}
@@ -204,12 +211,16 @@ class ProcessedQuestion:
         return chunks
     
     # To get synonyms of word in order to improve query by using query
-    # expanision technique
+    # expanision technique. Synonym table is used when available, otherwise
+    # WordNet is looked up
     # Input:
     #       word(str) : Word token
+    #       synonymTable(dict) : Same as constructor
     # Output:
     #       synonyms(list) : List of synonyms of given word
-    def getSynonyms(word):
+    def getSynonyms(self, word, synonymTable = None):
+        if synonymTable != None:
+            return synonymTable.get(PorterStemmer().stem(word.lower()), [])
         synonyms = []
         for syn in wordnet.synsets(word):
             for l in syn.lemmas():
@@ -217,6 +228,19 @@ class ProcessedQuestion:
                 synonyms.extend(w.split("_"))
         return list(set(synonyms))
     
+    # Stemmer is not pickled, it is rebuilt from useStemmer on unpickling
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['stem']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.stem = lambda k : k.lower()
+        if self.useStemmer:
+            ps = PorterStemmer()
+            self.stem = ps.stem
+
     # String representation of this class
     def __repr__(self):
         msg = "Q: " + self.question + "\n"
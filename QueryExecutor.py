@@ -0,0 +1,137 @@
+# ScriptName : QueryExecutor.py
+# Description : Answers questions concurrently over a thread pool sharing one
+#               DocumentRetrievalModel. NLTK corpora and models are loaded
+#               lazily on first use and that first load is not thread safe,
+#               hence they are loaded once before any thread is started.
+#               Tagger and chunker are the shared instances of Taggers, whose
+#               tag and parse only read model state once loaded.
+# Arguments :
+#       Input :
+#           drm(DocumentRetrievalModel) : Shared model
+#           maxWorkers(int)             : Number of threads
+#           useStemmer(boolean)         : Same as ProcessedQuestion
+#           useSynonyms(boolean)        : Same as ProcessedQuestion, synonym
+#                                         table of model is used if built
+#           removeStopwords(boolean)    : Same as ProcessedQuestion
+#           timeBudget(float)           : Seconds available per question, None
+#                                         for no limit
+#       Output :
+#           Instance of QueryExecutor with following structure
+#               answer(function) : Answer single question in calling thread
+#               answerWithStatus(function) : Same as answer, returns result of
+#                                  queryWithStatus with expected answer type,
+#                                  optionally against another model built with
+#                                  same flags
+#               submit(function) : Answer question in pool and return future
+#               submitWithStatus(function) : Same as submit, future resolves to
+#                                  result of answerWithStatus
+#               map(function)    : Answer questions in pool, return answers in
+#                                  input order
+
+from ProcessedQuestion import ProcessedQuestion
+from nltk.corpus import stopwords, wordnet
+from nltk.tokenize import sent_tokenize, word_tokenize
+from Taggers import getTagger, getChunker
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+class QueryExecutor:
+    def __init__(self, drm, maxWorkers = 4, useStemmer = True, useSynonyms = False, removeStopwords = True, timeBudget = None):
+        self.drm = drm
+        self.timeBudget = timeBudget
+        self.useStemmer = useStemmer
+        self.useSynonyms = useSynonyms
+        self.removeStopwords = removeStopwords
+        self.synonymTable = self.getSynonymTable(drm)
+
+        # Initialize
+        self.warmUp()
+        self.executor = ThreadPoolExecutor(max_workers = maxWorkers)
+
+    # Load every lazily loaded NLTK resource used by question processing and
+    # answer extraction in calling thread
+    def warmUp(self):
+        stopwords.words("english")
+        if self.useSynonyms and self.synonymTable == None:
+            wordnet.ensure_loaded()
+        for sent in sent_tokenize("John Smith lives in London. He works for Acme Corporation."):
+            word_tokenize(sent)
+        getTagger()
+        getChunker()
+
+    # Synonym table used to expand questions asked to model
+    # Input:
+    #       drm(DocumentRetrievalModel) : Model answering questions
+    # Output:
+    #       synonymTable(dict)          : Table of model, None to use WordNet
+    def getSynonymTable(self, drm):
+        if self.useSynonyms and drm.useSynonyms:
+            return drm.synonymTable
+        return None
+
+    # Answer question in calling thread
+    # Input:
+    #       question(str)   : Question string
+    # Output:
+    #       answer(str)     : Response of QA System
+    def answer(self, question):
+        return self.answerWithStatus(question)["answer"]
+
+    # Answer question in calling thread. Time budget covers question
+    # processing as well
+    # Input:
+    #       question(str)   : Question string
+    #       drm(DocumentRetrievalModel) : Model to ask, shared model if None
+    # Output:
+    #       result(dict)    : Result of DocumentRetrievalModel.queryWithStatus
+    #                         and expected answer type as aType
+    def answerWithStatus(self, question, drm = None):
+        synonymTable = self.synonymTable
+        if drm == None:
+            drm = self.drm
+        elif drm is not self.drm:
+            synonymTable = self.getSynonymTable(drm)
+        start = time.monotonic()
+        pq = ProcessedQuestion(question, self.useStemmer, self.useSynonyms, self.removeStopwords, synonymTable)
+        timeBudget = None
+        if self.timeBudget != None:
+            timeBudget = self.timeBudget - (time.monotonic() - start)
+        result = drm.queryWithStatus(pq, timeBudget)
+        result["aType"] = pq.aType
+        result["elapsed"] = time.monotonic() - start
+        return result
+
+    # Answer question in thread pool
+    # Input:
+    #       question(str)   : Question string
+    # Output:
+    #       future(Future)  : Future resolving to answer
+    def submit(self, question):
+        return self.executor.submit(self.answer, question)
+
+    # Answer question in thread pool
+    # Input:
+    #       question(str)   : Question string
+    #       drm(DocumentRetrievalModel) : Model to ask, shared model if None
+    # Output:
+    #       future(Future)  : Future resolving to result of answerWithStatus
+    def submitWithStatus(self, question, drm = None):
+        return self.executor.submit(self.answerWithStatus, question, drm)
+
+    # Answer questions in thread pool
+    # Input:
+    #       questions(list) : List of question string
+    # Output:
+    #       answers(list)   : List of answers in order of questions
+    def map(self, questions):
+        return list(self.executor.map(self.answer, questions))
+
+    # Wait for pending questions and stop threads
+    def close(self):
+        self.executor.shutdown(wait = True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
@@ -0,0 +1,59 @@
+# ScriptName : Taggers.py
+# Description : Holds single part of speech tagger and named entity chunker
+#               for the whole process. nltk.ne_chunk loads chunker model from
+#               disk on every call, which dominates tagging of every sentence
+#               of dataset. Both are created once on first use under a lock,
+#               and chunker parses one sentence before it is handed out so its
+#               lazily loaded word list is in place. Afterwards tag and parse
+#               only read model state, hence both are shared between threads.
+# Usage :
+#       posTag(tokens)  : Same as nltk.pos_tag
+#       neChunk(tagged) : Same as nltk.ne_chunk
+
+from nltk.tag import PerceptronTagger
+from nltk.chunk import ne_chunker
+import threading
+
+lock = threading.Lock()
+tagger = None
+chunker = None
+
+# Get shared part of speech tagger
+# Output:
+#       tagger(PerceptronTagger) : Loaded tagger
+def getTagger():
+    global tagger
+    if tagger == None:
+        with lock:
+            if tagger == None:
+                tagger = PerceptronTagger()
+    return tagger
+
+# Get shared named entity chunker
+# Output:
+#       chunker(Maxent_NE_Chunker) : Loaded and primed chunker
+def getChunker():
+    global chunker
+    if chunker == None:
+        with lock:
+            if chunker == None:
+                c = ne_chunker()
+                c.parse([("John","NNP"),("lives","VBZ"),("in","IN"),("London","NNP"),(".",".")])
+                chunker = c
+    return chunker
+
+# Tag tokens with part of speech
+# Input:
+#       tokens(list)    : List of word tokens
+# Output:
+#       tagged(list)    : List of tuple with token and tag
+def posTag(tokens):
+    return getTagger().tag(tokens)
+
+# Chunk named entities of tagged tokens
+# Input:
+#       tagged(list)    : List of tuple with token and tag
+# Output:
+#       tree(Tree)      : Tree with named entity subtrees
+def neChunk(tagged):
+    return getChunker().parse(tagged)
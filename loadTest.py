@@ -0,0 +1,186 @@
+# ScriptName : loadTest.py
+# Description : Replays questions of Stanford test dataset against
+#               DocumentRetrievalModel at configurable concurrency and request
+#               rate. Reports throughput and p50/p95/p99 latency overall and
+#               per expected answer type, and writes the result as JSON.
+#               A request covers question processing and answer retrieval,
+#               index of every topic is built and NLTK resources are loaded
+#               before replay starts.
+#               With fixed rate, latency is measured from the time request was
+#               scheduled, so queueing delay at saturation is included.
+#               Without rate, requests are issued as fast as workers take them
+#               and latency is measured from start of processing.
+# Usage :
+#       $ python3 loadTest.py --concurrency 8 --rate 20 --output loadtest.json
+#       $ python3 loadTest.py --topics USB Alloy --limit 200
+#       $ python3 loadTest.py --rate 20 --time-budget 0.5
+
+from DocumentRetrievalModel import DocumentRetrievalModel
+from StanfordDataset import StanfordDataset
+from LatencyStats import summarizeLatencies
+from QueryExecutor import QueryExecutor
+import argparse
+import json
+import time
+
+# Get questions of topics in dataset order
+# Input:
+#       sd(StanfordDataset) : Loaded dataset
+#       topics(list)        : List of topic names
+#       limit(int)          : Maximum number of questions, None for all
+# Output:
+#       questions(list)     : List of tuple with topic and question
+def loadQuestions(sd, topics, limit = None):
+    questions = []
+    for topic in topics:
+        for question in sd.getAllQuestions(topic):
+            questions.append((topic, question))
+    if limit != None:
+        questions = questions[:limit]
+    return questions
+
+# Build index for every topic having a question to replay
+# Input:
+#       sd(StanfordDataset) : Loaded dataset
+#       questions(list)     : List of tuple with topic and question
+# Output:
+#       models(dict)        : Topic and its DocumentRetrievalModel
+def buildModels(sd, questions):
+    models = {}
+    for (topic, question) in questions:
+        if topic not in models:
+            print("Building index for \"" + topic + "\"")
+            models[topic] = DocumentRetrievalModel(sd.getParagraph(topic),True,True)
+    return models
+
+# Record time request finished, called by worker thread completing it
+# Input:
+#       finished(list)      : Finish time of every request
+#       index(int)          : Index of request
+# Output:
+#       done(function)      : Callback for Future.add_done_callback
+def recordFinish(finished, index):
+    def done(future):
+        finished[index] = time.perf_counter()
+    return done
+
+# Replay questions against their topic index through one QueryExecutor, so
+# NLTK resources are loaded before replay and do not show up in latency
+# Input:
+#       models(dict)        : Topic and its DocumentRetrievalModel
+#       questions(list)     : List of tuple with topic and question
+#       concurrency(int)    : Number of worker threads
+#       rate(float)         : Requests per second, 0 to issue without pause
+#       timeBudget(float)   : Seconds available to every request, None for no
+#                             limit
+# Output:
+#       report(dict)        : Throughput and latency summary overall and per
+#                             answer type
+def replay(models, questions, concurrency, rate = 0, timeBudget = None):
+    futures = []
+    scheduled = [None]*len(questions)
+    finished = [None]*len(questions)
+    qe = QueryExecutor(models[questions[0][0]], concurrency, timeBudget = timeBudget)
+    start = time.perf_counter()
+    for index in range(0, len(questions)):
+        (topic, question) = questions[index]
+        if rate > 0:
+            scheduled[index] = start + index / rate
+            delay = scheduled[index] - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        future = qe.submitWithStatus(question, models[topic])
+        future.add_done_callback(recordFinish(finished, index))
+        futures.append(future)
+    for f in futures:
+        f.exception()
+    duration = time.perf_counter() - start
+    # Callbacks run after result is set, they are done once threads stopped
+    qe.close()
+
+    # With rate latency is measured from time request was scheduled,
+    # otherwise from start of processing
+    results = []
+    for index in range(0, len(futures)):
+        result = {"aType": None, "error": None, "degraded": False}
+        try:
+            r = futures[index].result()
+            result["aType"] = r["aType"]
+            result["degraded"] = r["degraded"]
+            if rate > 0:
+                result["latency"] = finished[index] - scheduled[index]
+            else:
+                result["latency"] = r["elapsed"]
+        except Exception as e:
+            result["error"] = type(e).__name__ + ": " + str(e)
+        results.append(result)
+
+    latencies = []
+    byType = {}
+    errors = {}
+    degraded = {}
+    for r in results:
+        if r["error"] != None:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+            continue
+        latencies.append(r["latency"])
+        byType.setdefault(r["aType"], []).append(r["latency"])
+        if r["degraded"]:
+            degraded[r["aType"]] = degraded.get(r["aType"], 0) + 1
+
+    report = {
+        "config": {"questions": len(questions), "concurrency": concurrency, "rate": rate, "timeBudget": timeBudget},
+        "durationSec": round(duration, 3),
+        "errors": sum(errors.values()),
+        "errorMessages": errors,
+        "overall": summarizeLatencies(latencies, duration),
+        "byAnswerType": {}
+    }
+    report["overall"]["degraded"] = sum(degraded.values())
+    for aType in sorted(byType):
+        report["byAnswerType"][aType] = summarizeLatencies(byType[aType], duration)
+        report["byAnswerType"][aType]["degraded"] = degraded.get(aType, 0)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description = "Replay test questions and report latency percentiles")
+    parser.add_argument("--topics", nargs = "*", help = "Topics to replay, all topics by default")
+    parser.add_argument("--limit", type = int, default = None, help = "Maximum number of questions")
+    parser.add_argument("--concurrency", type = int, default = 4, help = "Number of concurrent requests")
+    parser.add_argument("--rate", type = float, default = 0, help = "Requests per second, 0 for no limit")
+    parser.add_argument("--output", default = "loadtest.json", help = "File to write JSON report")
+    parser.add_argument("--time-budget", type = float, default = None, help = "Seconds available to every request")
+    args = parser.parse_args()
+
+    sd = StanfordDataset()
+    topics = args.topics if args.topics else sd.titles
+    unknown = [topic for topic in topics if topic not in sd.titles]
+    if len(unknown) > 0:
+        parser.error("unknown topic(s): " + ", ".join(unknown))
+    questions = loadQuestions(sd, topics, args.limit)
+    if len(questions) == 0:
+        print("No questions to replay")
+        return
+    models = buildModels(sd, questions)
+
+    print("Replaying " + str(len(questions)) + " questions")
+    report = replay(models, questions, args.concurrency, args.rate, args.time_budget)
+    report["config"]["topics"] = sorted(models.keys())
+
+    overall = report["overall"]
+    print("Throughput :", overall["throughput"], "req/s")
+    print("Latency    : p50", overall["p50Ms"], "ms, p95", overall["p95Ms"], "ms, p99", overall["p99Ms"], "ms")
+    for aType in report["byAnswerType"]:
+        s = report["byAnswerType"][aType]
+        print("  " + aType + " (" + str(s["count"]) + ") : p50", s["p50Ms"], "ms, p95", s["p95Ms"], "ms, p99", s["p99Ms"], "ms")
+    if overall["degraded"] > 0:
+        print("Degraded   :", overall["degraded"])
+    if report["errors"] > 0:
+        print("Errors     :", report["errors"])
+
+    with open(args.output, "w") as output_file:
+        json.dump(report, output_file, indent = 2)
+    print("Written the load test report in " + args.output + " file. Done")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# ScriptName : testConcurrency.py
+# Description : Stress test of QueryExecutor. Answers all questions of topics
+#               serially and then repeatedly from many threads sharing one
+#               DocumentRetrievalModel, and checks every concurrent answer
+#               matches serial one. Exits with non-zero code on mismatch.
+# Usage :
+#       $ python3 testConcurrency.py --topics USB Alloy --workers 8 --rounds 3
+
+from DocumentRetrievalModel import DocumentRetrievalModel
+from StanfordDataset import StanfordDataset
+from QueryExecutor import QueryExecutor
+import argparse
+import random
+import sys
+
+# Compare serial and concurrent answers of one topic
+# Input:
+#       sd(StanfordDataset) : Loaded dataset
+#       topic(str)          : Name of topic
+#       workers(int)        : Number of threads
+#       rounds(int)         : Number of times questions are replayed
+# Output:
+#       mismatches(list)    : List of tuple with question, serial and
+#                             concurrent answer
+def stressTopic(sd, topic, workers, rounds):
+    drm = DocumentRetrievalModel(sd.getParagraph(topic),True,True)
+    questions = sd.getAllQuestions(topic)
+    mismatches = []
+    with QueryExecutor(drm, workers) as qe:
+        expected = {}
+        for question in questions:
+            expected[question] = qe.answer(question)
+
+        # Shuffle so threads interleave different questions in every round
+        replay = questions * rounds
+        random.Random(0).shuffle(replay)
+        answers = qe.map(replay)
+        for index in range(0, len(replay)):
+            if answers[index] != expected[replay[index]]:
+                mismatches.append((replay[index], expected[replay[index]], answers[index]))
+    return mismatches
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Check concurrent answers match serial answers")
+    parser.add_argument("--topics", nargs = "*", help = "Topics to test, all topics by default")
+    parser.add_argument("--workers", type = int, default = 8, help = "Number of threads")
+    parser.add_argument("--rounds", type = int, default = 3, help = "Number of times questions are replayed")
+    args = parser.parse_args()
+
+    sd = StanfordDataset()
+    topics = args.topics if args.topics else sd.titles
+    unknown = [topic for topic in topics if topic not in sd.titles]
+    if len(unknown) > 0:
+        parser.error("unknown topic(s): " + ", ".join(unknown))
+    failed = 0
+    for topic in topics:
+        mismatches = stressTopic(sd, topic, args.workers, args.rounds)
+        print(topic + ":", len(mismatches), "mismatch(es)")
+        for (question, serial, concurrent) in mismatches[:5]:
+            print("\tQ:", question, "| serial:", serial, "| concurrent:", concurrent)
+        if len(mismatches) > 0:
+            failed += 1
+    if failed > 0:
+        print("Concurrent answers differ from serial answers in " + str(failed) + " topic(s)")
+        sys.exit(1)
+    print("Concurrent answers match serial answers. Done")
@@ -0,0 +1,106 @@
+# ScriptName : testCorpusStore.py
+# Description : Checks byte offsets of CorpusStore. Paragraphs must match
+#               stripped non empty lines of dataset file and sentences must
+#               match sent_tokenize of every paragraph, for every dataset and
+#               for handmade sample with multi byte characters, surrounding
+#               whitespace, CRLF line ends and missing final new line. Sentence
+#               which tokenizer altered must not lose text of paragraph. Exits
+#               with non-zero code on failure.
+# Usage :
+#       $ python3 testCorpusStore.py
+#       $ python3 testCorpusStore.py --datasets dataset/USB.txt
+
+import CorpusStore
+import argparse
+import glob
+import os
+import sys
+import tempfile
+
+SAMPLE = "  Héllo wörld. Ünïcode sentence — with dash!  \n\n\r\n\tÅnother paragraph. Yes?\r\n   \nlast paragraph without new line. 日本語の文。"
+
+# Paragraphs of dataset file read as text
+# Input:
+#       datasetName(str)    : Path of dataset file
+# Output:
+#       paragraphs(list)    : Stripped non empty lines
+def readParagraphs(datasetName):
+    with open(datasetName, "r", encoding = "utf-8", newline = "") as datasetFile:
+        lines = datasetFile.read().split("\n")
+    return [line.strip() for line in lines if len(line.strip()) > 0]
+
+# Remove all whitespace, used to compare text regardless of gaps between
+# sentences
+def squeeze(text):
+    return "".join(text.split())
+
+# Compare CorpusStore of dataset with text reading it
+# Input:
+#       datasetName(str)    : Path of dataset file
+# Output:
+#       errors(list)        : List of failure messages
+def checkStore(datasetName):
+    errors = []
+    expected = readParagraphs(datasetName)
+    store = CorpusStore.CorpusStore(datasetName)
+    try:
+        if list(store) != expected:
+            errors.append(datasetName + ": paragraphs differ from lines of file")
+            return errors
+        for index in range(0, len(expected)):
+            sentences = store.getSentences(index)
+            if sentences != CorpusStore.sent_tokenize(expected[index]):
+                errors.append(datasetName + ": sentences of paragraph " + str(index) + " differ from sent_tokenize")
+    finally:
+        store.close()
+    return errors
+
+# Check sentence which tokenizer altered keeps rest of paragraph
+# Input:
+#       datasetName(str)    : Path of dataset file
+# Output:
+#       errors(list)        : List of failure messages
+def checkAlteredSentence(datasetName):
+    errors = []
+    tokenize = CorpusStore.sent_tokenize
+    # Sentences come back with dash replaced, as tokenizers do with quotes
+    CorpusStore.sent_tokenize = lambda p: [s.replace("\u2014", "--") for s in tokenize(p)]
+    try:
+        store = CorpusStore.CorpusStore(datasetName)
+        for index in range(0, len(store)):
+            if squeeze("".join(store.getSentences(index))) != squeeze(store[index]):
+                errors.append(datasetName + ": text of paragraph " + str(index) + " lost after altered sentence")
+        store.close()
+    finally:
+        CorpusStore.sent_tokenize = tokenize
+    return errors
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Check paragraph and sentence offsets of CorpusStore")
+    parser.add_argument("--datasets", nargs = "*", help = "Dataset files to check, all of dataset folder by default")
+    args = parser.parse_args()
+
+    directory = os.path.dirname(os.path.abspath(__file__))
+    datasets = args.datasets if args.datasets else sorted(glob.glob(os.path.join(directory, "dataset", "*.txt")))
+    errors = []
+    for datasetName in datasets:
+        errors.extend(checkStore(datasetName))
+
+    sampleFile = tempfile.NamedTemporaryFile("wb", suffix = ".txt", delete = False)
+    try:
+        sampleFile.write(SAMPLE.encode("utf-8"))
+        sampleFile.close()
+        errors.extend(checkStore(sampleFile.name))
+        errors.extend(checkAlteredSentence(sampleFile.name))
+        with open(sampleFile.name, "wb") as emptyFile:
+            emptyFile.write(b"")
+        errors.extend(checkStore(sampleFile.name))
+    finally:
+        os.remove(sampleFile.name)
+
+    for error in errors:
+        print("\t" + error)
+    if len(errors) > 0:
+        print("CorpusStore failed " + str(len(errors)) + " check(s)")
+        sys.exit(1)
+    print("CorpusStore matches text of " + str(len(datasets)) + " dataset(s) and sample. Done")
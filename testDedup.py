@@ -0,0 +1,61 @@
+# ScriptName : testDedup.py
+# Description : Checks near duplicate collapsing of DocumentRetrievalModel on
+#               handmade paragraphs. Near identical paragraphs must collapse
+#               into first of them, distinct paragraphs must be kept, and
+#               duplicates must map back to original paragraph indexes.
+#               Threshold outside (0, 1] must be rejected. Exits with non-zero
+#               code on failure.
+# Usage :
+#       $ python3 testDedup.py
+
+from DocumentRetrievalModel import DocumentRetrievalModel
+import sys
+
+paragraphs = [
+    "The Universal Serial Bus was developed by a group of seven companies in 1994 to standardize the connection of computer peripherals to personal computers, both to communicate and to supply electric power.",
+    "Beyonce rose to fame in the late 1990s as lead singer of the R&B girl group Destiny's Child, one of the best-selling girl groups of all time.",
+    "the universal serial bus was developed by a group of seven companies in 1994, to standardize the connection of computer peripherals to personal computers both to communicate and to supply electric power!",
+    "An alloy is a mixture of metals or a mixture of a metal and another element, and it is usually harder and stronger than the pure metals it is made of.",
+    "Beyonce rose to fame in the late 1990s as lead singer of the R&B girl group Destiny's Child, one of the best-selling girl groups of all time ever.",
+]
+
+# Check collapsing of handmade paragraphs
+# Output:
+#       errors(list)    : List of failure messages
+def checkCollapse():
+    errors = []
+    drm = DocumentRetrievalModel(paragraphs,True,True,False,False,0.8)
+    if drm.paragraphIds != [0,1,3]:
+        errors.append("kept paragraphs " + str(drm.paragraphIds) + ", expected [0, 1, 3]")
+    if drm.duplicates != {0:[2],1:[4]}:
+        errors.append("duplicates " + str(drm.duplicates) + ", expected {0: [2], 1: [4]}")
+    if sorted(drm.paragraphInfo.keys()) != drm.paragraphIds:
+        errors.append("indexed paragraphs " + str(sorted(drm.paragraphInfo.keys())) + " differ from kept paragraphs")
+
+    # Nothing is collapsed without threshold
+    drm = DocumentRetrievalModel(paragraphs,True,True)
+    if drm.paragraphIds != list(range(0,len(paragraphs))) or drm.duplicates != {}:
+        errors.append("paragraphs collapsed without threshold")
+    return errors
+
+# Check threshold outside (0, 1] is rejected
+# Output:
+#       errors(list)    : List of failure messages
+def checkThreshold():
+    errors = []
+    for threshold in [0, -0.5, 1.5]:
+        try:
+            DocumentRetrievalModel(paragraphs,True,True,False,False,threshold)
+            errors.append("threshold " + str(threshold) + " accepted")
+        except ValueError:
+            pass
+    return errors
+
+if __name__ == "__main__":
+    errors = checkCollapse() + checkThreshold()
+    for error in errors:
+        print("\t" + error)
+    if len(errors) > 0:
+        print("Near duplicate collapsing failed " + str(len(errors)) + " check(s)")
+        sys.exit(1)
+    print("Near duplicate collapsing works. Done")
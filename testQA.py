@@ -1,23 +1,43 @@
-from DocumentRetrievalModel import DocumentRetrievalModel
+from DocumentRetrievalModel import DocumentRetrievalModel, checkDedupThreshold
 from ProcessedQuestion import ProcessedQuestion
 from StanfordDataset import StanfordDataset
+from PreprocessCache import PreprocessCache
+from LatencyStats import percentile
 from nltk.tokenize import word_tokenize
+import argparse
 import csv
+import json
 import math
+import sys
+import time
 
-def computeAccuracy(topic,sd = StanfordDataset()):
+def computeAccuracy(topic,sd = StanfordDataset(),cache = None,useEntityFilter = False,dedupThreshold = None,useSynonyms = False):
     
     testPara = sd.getParagraph(topic)
     
-    drm = DocumentRetrievalModel(testPara,True,True)
+    # Loading cached index is timed separately from building it
+    start = time.perf_counter()
+    cached = False
+    if cache == None:
+        drm = DocumentRetrievalModel(testPara,True,True,useSynonyms,useEntityFilter,dedupThreshold)
+    else:
+        (drm, cached) = cache.getModel(testPara,True,True,useSynonyms,useEntityFilter,dedupThreshold)
+    indexTime = round(time.perf_counter() - start,3)
+    indexBuildTime = None if cached else indexTime
+    indexLoadTime = indexTime if cached else None
     
+    synonymTable = drm.synonymTable if useSynonyms else None
     result = []
+    latencies = []
     res = [[0,0],[0,0],[0,0],[0,0]]
     devData =sd.getTopic(topic)
     for index in range(0,len(devData['paragraphs'])):
         p = devData['paragraphs'][index]
         for qNo in range(0,len(p['qas'])):
-            pq = ProcessedQuestion(p['qas'][qNo]['question'],True,False,True)
+            if cache == None:
+                pq = ProcessedQuestion(p['qas'][qNo]['question'],True,useSynonyms,True,synonymTable)
+            else:
+                pq = cache.getQuestion(p['qas'][qNo]['question'],True,useSynonyms,True,synonymTable)
             index = 0
             if pq.aType == 'PERSON':
                 index = 0
@@ -28,7 +48,9 @@ def computeAccuracy(topic,sd = StanfordDataset()):
             else:
                 index = 3
             res[index][0] += 1
+            start = time.perf_counter()
             r = drm.query(pq)
+            latencies.append(time.perf_counter() - start)
             answers = []
             for ans in p['qas'][qNo]['answers']:
                 answers.append(ans['text'].lower())
@@ -52,10 +74,51 @@ def computeAccuracy(topic,sd = StanfordDataset()):
         accuracy = correct/noOfResult
     #return (result,accuracy)
     #return {"Topic":topic,"No of Ques":noOfResult,"Correct Retrieval":correct,"whoAccu":res[0][1]/(res[0][0]+1),"whenAccu":res[1][1]/(res[1][0]+1),"whereAccu":res[2][1]/(res[2][0]+1),"summarizationAccu":res[3][1]/(res[3][0]+1),"OverallAccuracy":accuracy}
-    return {"Topic":topic,"No of Ques":noOfResult,"Correct Retrieval":correct,"OverallAccuracy":round(accuracy*100,2)}
+    toMs = lambda v: None if v == None else round(v*1000,3)
+    return {"Topic":topic,"No of Ques":noOfResult,"Correct Retrieval":correct,"OverallAccuracy":round(accuracy*100,2),
+            "Index Build (s)":indexBuildTime,"Index Load (s)":indexLoadTime,"p50 Latency (ms)":toMs(percentile(latencies,50)),"p95 Latency (ms)":toMs(percentile(latencies,95))}
+
+# Compare result of every topic with stored baseline
+# Input:
+#       results(list)           : List of computeAccuracy result
+#       baseline(dict)          : Topic and its computeAccuracy result
+#       maxAccuracyDrop(float)  : Allowed drop of accuracy in percentage points
+#       maxLatencyGrowth(float) : Allowed relative growth of p95 latency,
+#                                 0.25 means 25% slower
+# Output:
+#       report(dict)            : Per topic difference and list of regressed
+#                                 topics
+def compareWithBaseline(results, baseline, maxAccuracyDrop, maxLatencyGrowth):
+    report = {"maxAccuracyDrop":maxAccuracyDrop,"maxLatencyGrowth":maxLatencyGrowth,"topics":[],"regressions":[]}
+    for d in results:
+        topic = d["Topic"]
+        diff = {"Topic":topic,"OverallAccuracy":d["OverallAccuracy"],"p95 Latency (ms)":d["p95 Latency (ms)"],
+                "Index Build (s)":d["Index Build (s)"],"Index Load (s)":d["Index Load (s)"],"Flags":[]}
+        if topic not in baseline:
+            diff["Flags"].append("new topic")
+            report["topics"].append(diff)
+            continue
+        b = baseline[topic]
+        diff["Baseline OverallAccuracy"] = b["OverallAccuracy"]
+        diff["Baseline p95 Latency (ms)"] = b["p95 Latency (ms)"]
+        diff["Baseline Index Build (s)"] = b.get("Index Build (s)")
+        diff["Accuracy Change"] = round(d["OverallAccuracy"] - b["OverallAccuracy"],2)
+        if -diff["Accuracy Change"] > maxAccuracyDrop:
+            diff["Flags"].append("accuracy dropped")
+        if b["p95 Latency (ms)"] and d["p95 Latency (ms)"] != None:
+            diff["p95 Latency Growth"] = round(d["p95 Latency (ms)"]/b["p95 Latency (ms)"] - 1,3)
+            if diff["p95 Latency Growth"] > maxLatencyGrowth:
+                diff["Flags"].append("p95 latency grew")
+        if "accuracy dropped" in diff["Flags"] or "p95 latency grew" in diff["Flags"]:
+            report["regressions"].append(topic)
+        report["topics"].append(diff)
+    return report
 
-def runAll():
+def runAll(baselineFile = None, saveBaselineFile = None, maxAccuracyDrop = 1.0, maxLatencyGrowth = 0.25, reportFile = "regression.json", cacheDir = ".qa_cache", useEntityFilter = False, dedupThreshold = None, useSynonyms = False):
     sd = StanfordDataset()
+    cache = None
+    if cacheDir != None:
+        cache = PreprocessCache(cacheDir)
 
     toCSV = []
     total = len(sd.titles)
@@ -63,7 +126,7 @@ def runAll():
     tA = 0
     for title in sd.titles:
         print("Testing all questions for \"" + title + "\"")
-        d=computeAccuracy(title)
+        d=computeAccuracy(title,sd,cache,useEntityFilter,dedupThreshold,useSynonyms)
         if d["No of Ques"] == 0:
             continue
         tA += d['OverallAccuracy']
@@ -72,6 +135,8 @@ def runAll():
         toCSV.append(d)
         index += 1
     print("OverallAccuracy : ",tA/total)
+    if cache != None:
+        print(cache)
 
     keys = toCSV[0].keys()
     with open('accuracy.csv', 'w') as output_file:
@@ -81,5 +146,47 @@ def runAll():
 
     print("Written the accuracy measure in accuracy.csv file. Done")
 
+    if saveBaselineFile != None:
+        with open(saveBaselineFile, 'w') as output_file:
+            json.dump({d["Topic"]:d for d in toCSV}, output_file, indent=2)
+        print("Written the baseline in " + saveBaselineFile + " file")
+
+    if baselineFile == None:
+        return 0
+
+    with open(baselineFile, 'r') as input_file:
+        baseline = json.load(input_file)
+    report = compareWithBaseline(toCSV, baseline, maxAccuracyDrop, maxLatencyGrowth)
+    with open(reportFile, 'w') as output_file:
+        json.dump(report, output_file, indent=2)
+
+    for diff in report["topics"]:
+        if len(diff["Flags"]) > 0:
+            print(diff["Topic"] + ":", ", ".join(diff["Flags"]), diff)
+    print("Written the regression report in " + reportFile + " file")
+    if len(report["regressions"]) > 0:
+        print("Regression in " + str(len(report["regressions"])) + " topic(s):", ", ".join(report["regressions"]))
+        return 1
+    print("No regression against " + baselineFile)
+    return 0
+
 
-runAll()
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description = "Measure accuracy and latency on Stanford test dataset")
+    parser.add_argument("--baseline", help = "Baseline file to compare with")
+    parser.add_argument("--save-baseline", help = "File to store result as new baseline")
+    parser.add_argument("--max-accuracy-drop", type = float, default = 1.0, help = "Allowed accuracy drop in percentage points")
+    parser.add_argument("--max-latency-growth", type = float, default = 0.25, help = "Allowed relative growth of p95 latency")
+    parser.add_argument("--report", default = "regression.json", help = "File to write regression report")
+    parser.add_argument("--cache-dir", default = ".qa_cache", help = "Directory of preprocessing cache")
+    parser.add_argument("--no-cache", action = "store_true", help = "Rebuild indexes and questions from scratch")
+    parser.add_argument("--entity-filter", action = "store_true", help = "Skip paragraphs and sentences without expected entity type")
+    parser.add_argument("--dedup", type = float, default = None, help = "Collapse paragraphs with estimated similarity above threshold")
+    parser.add_argument("--synonyms", action = "store_true", help = "Expand questions with synonyms found in paragraphs")
+    args = parser.parse_args()
+    try:
+        checkDedupThreshold(args.dedup)
+    except ValueError as e:
+        parser.error(str(e))
+    cacheDir = None if args.no_cache else args.cache_dir
+    sys.exit(runAll(args.baseline, args.save_baseline, args.max_accuracy_drop, args.max_latency_growth, args.report, cacheDir, args.entity_filter, args.dedup, args.synonyms))
\ No newline at end of file
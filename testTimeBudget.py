@@ -0,0 +1,51 @@
+# ScriptName : testTimeBudget.py
+# Description : Checks time budget of DocumentRetrievalModel on handmade
+#               paragraphs. Without budget, queryWithStatus must give same
+#               answer as query and must not be degraded. With zero budget,
+#               answer must be degraded but not empty. Exits with non-zero
+#               code on failure.
+# Usage :
+#       $ python3 testTimeBudget.py
+
+from DocumentRetrievalModel import DocumentRetrievalModel
+from ProcessedQuestion import ProcessedQuestion
+import sys
+
+paragraphs = [
+    "The Universal Serial Bus was developed by a group of seven companies in 1994. Ajay Bhatt of Intel led the work on the first specification. USB 3.1 was released in July 2013.",
+    "Beyonce was born in Houston, Texas. She rose to fame in the late 1990s as lead singer of the girl group Destiny's Child.",
+    "An alloy is a mixture of metals or a mixture of a metal and another element. Steel is an alloy of iron and carbon.",
+]
+
+questions = [
+    "Who led the work on the first USB specification?",
+    "When was USB 3.1 released?",
+    "Where was Beyonce born?",
+    "What is steel?",
+]
+
+# Check answers with and without time budget
+# Output:
+#       errors(list)    : List of failure messages
+def checkBudget():
+    errors = []
+    drm = DocumentRetrievalModel(paragraphs,True,True)
+    for question in questions:
+        pq = ProcessedQuestion(question,True,False,True)
+        expected = drm.query(pq)
+        result = drm.queryWithStatus(pq)
+        if result["answer"] != expected or result["degraded"]:
+            errors.append(question + " without budget: " + str(result) + ", expected answer " + repr(expected))
+        result = drm.queryWithStatus(pq,0)
+        if not result["degraded"] or len(result["answer"].strip()) == 0:
+            errors.append(question + " with zero budget: " + str(result) + ", expected degraded non-empty answer")
+    return errors
+
+if __name__ == "__main__":
+    errors = checkBudget()
+    for error in errors:
+        print("\t" + error)
+    if len(errors) > 0:
+        print("Time budget failed " + str(len(errors)) + " check(s)")
+        sys.exit(1)
+    print("Time budget works. Done")